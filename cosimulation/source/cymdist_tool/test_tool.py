@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+import unittest
+import unittest.mock
+import numpy as np
+import pandas
+
+# Make "source" importable when running from this folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import source.cymdist_tool.tool as tool
+
+
+class TestMeanMaxDiff(unittest.TestCase):
+    """The NumPy and Numba kernels of get_unbalanced_line must agree"""
+
+    def _phases(self):
+        rows = [[1.0, 1.1, 0.9],             # balanced enough
+                [1.0, np.nan, 1.2],          # missing phase
+                [np.nan, np.nan, np.nan],    # all phases missing
+                [0.0, 0.0, 0.0],             # zero mean
+                [0.0, 1.0, -1.0],            # zero mean, non zero phases
+                [np.inf, 1.0, 1.0],          # infinite voltage
+                [-1.0, -2.0, -3.0]]          # negative mean
+        random = np.random.RandomState(0).uniform(0.9, 1.1, (500, 3))
+        random[np.random.RandomState(1).uniform(size=(500, 3)) < 0.2] = np.nan
+        return np.ascontiguousarray(np.vstack([rows, random]))
+
+    def test_numpy_kernel(self):
+        mean, diff = tool._mean_max_diff_numpy(self._phases()[:5])
+        np.testing.assert_allclose(mean, [1.0, 1.1, np.nan, 0.0, 0.0])
+        np.testing.assert_allclose(diff, [10.0, 100 * 0.1 / 1.1, np.nan, np.nan, np.inf])
+
+    @unittest.skipIf(tool._mean_max_diff_numba is None, 'numba is not installed')
+    def test_numba_matches_numpy(self):
+        for phases in [self._phases(), np.empty((0, 3))]:
+            expected_mean, expected_diff = tool._mean_max_diff_numpy(phases)
+            mean, diff = tool._mean_max_diff_numba(phases)
+            np.testing.assert_allclose(mean, expected_mean)
+            np.testing.assert_allclose(diff, expected_diff)
+
+
+    def test_unbalanced_line_kernel_choice(self):
+        voltage = pandas.DataFrame(self._phases()[:5], columns=['voltage_A', 'voltage_B', 'voltage_C'])
+        with unittest.mock.patch.object(tool, '_mean_max_diff_numba') as numba_kernel:
+            numba_kernel.side_effect = tool._mean_max_diff_numpy
+            unbalance = tool.get_unbalanced_line(None, voltage=voltage)
+            self.assertFalse(numba_kernel.called)
+            tool.get_unbalanced_line(None, voltage=voltage, jit=True)
+            self.assertTrue(numba_kernel.called)
+        np.testing.assert_allclose(unbalance['mean_voltage_ABC'], [1.0, 1.1, np.nan, 0.0, 0.0])
+
+
+
+class TestQueryColumns(unittest.TestCase):
+    """Queries must come back as one column per keyword, in the order of ids"""
+
+    def _query(self, keyword, *identifier):
+        return keyword + ':' + '/'.join(identifier)
+
+    def test_run_queries_order(self):
+        # Later queries return first, the results must still follow the arguments
+        def query(index):
+            time.sleep((200 - index) * 0.00001)
+            return index
+        for workers in [None, 4]:
+            self.assertEqual(tool._run_queries(query, [(index,) for index in range(0, 200)], workers),
+                             list(range(0, 200)))
+
+    def test_columns(self):
+        ids = [('N' + str(index), 'T' + str(index % 3)) for index in range(0, 50)]
+        keywords = ['VpuA', 'VpuB', 'VpuC', 'Distance']
+        for workers in [None, 4]:
+            columns = tool._query_columns(self._query, ids, keywords, workers)
+            self.assertEqual(columns, [[keyword + ':' + '/'.join(identifier) for identifier in ids]
+                                       for keyword in keywords])
+
+    def test_no_ids(self):
+        for workers in [None, 4]:
+            self.assertEqual(tool._query_columns(self._query, [], ['VpuA', 'VpuB'], workers), [[], []])
+
+    def test_devices(self):
+        devices = pandas.DataFrame({'device_number': ['D1', 'D2'], 'device_type_id': [10, 14]})
+        with unittest.mock.patch.object(tool, 'cympy', create=True) as cympy:
+            cympy.study.QueryInfoDevice = lambda keyword, number, device_type: (keyword, number, device_type)
+            for workers in [None, 4]:
+                self.assertEqual(tool._query_devices(devices, ['KWA', 'KWB'], workers),
+                                 [[('KWA', 'D1', 10), ('KWA', 'D2', 14)],
+                                  [('KWB', 'D1', 10), ('KWB', 'D2', 14)]])
+
+
+    def test_integer_answers_stay_float(self):
+        devices = pandas.DataFrame({'device_number': ['D1', 'D2'], 'device_type_id': [10, 14]})
+        with unittest.mock.patch.object(tool, 'cympy', create=True) as cympy:
+            cympy.study.QueryInfoDevice = lambda keyword, number, device_type: '120'
+            frames = [tool.get_voltage(devices), tool.get_overload(devices),
+                      tool.get_load(devices), tool.get_distance(devices)]
+        for frame in frames:
+            for column in frame.columns.difference(devices.columns):
+                self.assertEqual(frame[column].dtype, np.float64, column)
+
+
+if __name__ == '__main__':
+    unittest.main()
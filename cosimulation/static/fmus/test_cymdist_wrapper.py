@@ -0,0 +1,118 @@
+import importlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+
+
+class FakeDevice(object):
+    """Device returned by the fake AddDevice"""
+    def SetValue(self, *args):
+        pass
+
+
+def fake_cympy(calls):
+    """Fake cympy module recording the calls that change the study"""
+    study = types.SimpleNamespace(
+        Open=lambda filename: calls.append(('Open', filename)),
+        RemoveDevice=lambda name, device_type: calls.append(('RemoveDevice', name)),
+        AddDevice=lambda name, *args: calls.append(('AddDevice', name)) or FakeDevice(),
+        ListNetworks=lambda: ['network'],
+        SetValueTopo=lambda *args: None,
+        SetValueDevice=lambda *args: None,
+        GetValueTopo=lambda *args: 'source',
+        QueryInfoDevice=lambda *args: 'ABC',
+        QueryInfoNode=lambda *args: '1.0')
+    sim = types.SimpleNamespace(LoadFlow=lambda: types.SimpleNamespace(Run=lambda: None))
+    enums = types.SimpleNamespace(Location=types.SimpleNamespace(FirstAvailable=0),
+                                  DeviceType=types.SimpleNamespace(Photovoltaic=39))
+    return types.SimpleNamespace(study=study, sim=sim, enums=enums)
+
+
+class TestOpenModel(unittest.TestCase):
+    """The study must only be reused when nothing but the voltages change"""
+
+    def setUp(self):
+        self.calls = []
+        self.folder = tempfile.mkdtemp()
+        self.models = [os.path.join(self.folder, name) for name in ['a.sxst', 'b.sxst']]
+        for filename in self.models:
+            open(filename, 'w').close()
+
+        # Load the wrapper with the fake cympy
+        sys.modules['cympy'] = fake_cympy(self.calls)
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import cymdist_wrapper
+        self.wrapper = importlib.reload(cymdist_wrapper)
+
+    def tearDown(self):
+        sys.path.pop(0)
+        del sys.modules['cympy']
+        shutil.rmtree(self.folder)
+
+    def _model(self, filename=0, set_loads=None, new_loads=('S1',), new_pvs=()):
+        return {'filename': self.models[filename],
+                'set_loads': set_loads or [],
+                'set_pvs': [],
+                'new_loads': [{'section_id': section, 'active_power': 10} for section in new_loads],
+                'new_pvs': [{'section_id': section, 'generation': 10} for section in new_pvs],
+                'save': 'False'}
+
+    def _step(self, model):
+        """Run one step and return the calls to Open and RemoveDevice"""
+        configuration_filename = os.path.join(self.folder, 'config.json')
+        with open(configuration_filename, 'w') as configuration_file:
+            json.dump({'times': [0], 'models': [model]}, configuration_file)
+        del self.calls[:]
+        self.wrapper.cymdist(configuration_filename, 0, ['VMAG_A', 'VMAG_B', 'VMAG_C'],
+                             [2520, 2520, 2520], ['IA'], 0)
+        return [call for call in self.calls if call[0] in ['Open', 'RemoveDevice']]
+
+    def test_identical_step_reuses_study(self):
+        self._step(self._model())
+        self.assertEqual(self._step(self._model()), [('RemoveDevice', 'MY_LOAD_0')])
+
+    def test_failed_removal_opens(self):
+        self._step(self._model(new_loads=['S1', 'S2']))
+        study = sys.modules['cympy'].study
+        remove_device = study.RemoveDevice
+
+        def failing_remove_device(name, device_type):
+            if name == 'MY_LOAD_1':
+                study.RemoveDevice = remove_device
+                raise RuntimeError('cannot remove ' + name)
+            remove_device(name, device_type)
+        study.RemoveDevice = failing_remove_device
+        self.assertEqual(self._step(self._model(new_loads=['S1', 'S2'])),
+                         [('RemoveDevice', 'MY_LOAD_0'), ('Open', self.models[0])])
+        self.assertEqual(self._step(self._model(new_loads=['S1', 'S2'])),
+                         [('RemoveDevice', 'MY_LOAD_0'), ('RemoveDevice', 'MY_LOAD_1')])
+
+    def test_file_change_opens(self):
+        self._step(self._model())
+        self.assertEqual(self._step(self._model(filename=1)), [('Open', self.models[1])])
+
+    def test_mtime_change_opens(self):
+        self._step(self._model())
+        os.utime(self.models[0], (0, 0))
+        self.assertEqual(self._step(self._model()), [('Open', self.models[0])])
+
+    def test_set_values_change_opens(self):
+        self._step(self._model())
+        set_loads = [{'device_number': 'L1', 'active_power': [{'active_power': 5, 'phase_index': 0}]}]
+        self.assertEqual(self._step(self._model(set_loads=set_loads)), [('Open', self.models[0])])
+
+    def test_new_load_section_change_opens(self):
+        self._step(self._model(new_loads=['S1']))
+        self.assertEqual(self._step(self._model(new_loads=['S9'])), [('Open', self.models[0])])
+
+    def test_new_pv_section_change_opens(self):
+        self._step(self._model(new_pvs=['S1']))
+        self.assertEqual(self._step(self._model(new_pvs=['S9'])), [('Open', self.models[0])])
+
+
+if __name__ == '__main__':
+    unittest.main()
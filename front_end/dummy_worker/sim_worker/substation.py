@@ -100,17 +100,10 @@ class Substation(object):
             nodes.loc[node.Index, 'longitude'] = cympy.study.QueryInfoNode("CoordX", node.node_id)
             nodes.loc[node.Index, 'distance'] = cympy.study.QueryInfoNode("Distance", node.node_id)
 
-        # Cast the right type
-        for column in ['latitude']:
-            nodes[column] = nodes[column].apply(lambda x: None if x is '' else float(x) / (1.26 * 100000))
-
-        # Cast the right type
-        for column in ['longitude']:
-            nodes[column] = nodes[column].apply(lambda x: None if x is '' else float(x) / (100000))
-
-        # Cast the right type
-        for column in ['distance']:
-            nodes[column] = nodes[column].apply(lambda x: None if x is '' else float(x))
+        # Cast the right type and scale the coordinates
+        nodes['latitude'] = pandas.to_numeric(nodes['latitude'], errors='coerce') / (1.26 * 100000)
+        nodes['longitude'] = pandas.to_numeric(nodes['longitude'], errors='coerce') / 100000
+        nodes['distance'] = pandas.to_numeric(nodes['distance'], errors='coerce')
         return nodes
 
     def get_voltage(self, frame):
@@ -136,6 +129,6 @@ class Substation(object):
             voltage.loc[value.Index, 'voltage_C'] = cympy.study.QueryInfoNode("VpuC", value.node_id)
 
         # Cast the right type
-        for column in ['voltage_A', 'voltage_B', 'voltage_C']:
-            voltage[column] = voltage[column].apply(lambda x: None if x is '' else float(x))
+        voltage[['voltage_A', 'voltage_B', 'voltage_C']] = voltage[['voltage_A', 'voltage_B', 'voltage_C']].apply(
+            pandas.to_numeric, errors='coerce')
         return voltage
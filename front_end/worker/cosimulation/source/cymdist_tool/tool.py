@@ -1,15 +1,23 @@
 # -*- coding: utf-8 -*-
-from __future__ import division
 import pandas
 import source.cymdist_tool.type_lookup as lookup
-import pickle
 import numpy as np
-import json
+from concurrent.futures import ThreadPoolExecutor
 try:
     import cympy
-except:
+except ImportError:
     # Only installed on the Cymdist server
     pass
+try:
+    from numba import njit, prange
+except ImportError:
+    # Optional, the NumPy version of the kernels is used instead
+    njit = None
+
+# Path to the operating voltage of the source for the phase A, B and C
+_VOLT_PATHS = ("Sources[0].EquivalentSourceModels[0].EquivalentSource.OperatingVoltage1",
+               "Sources[0].EquivalentSourceModels[0].EquivalentSource.OperatingVoltage2",
+               "Sources[0].EquivalentSourceModels[0].EquivalentSource.OperatingVoltage3")
 
 
 def list_loads():
@@ -17,29 +25,29 @@ def list_loads():
     # Get a list of all the loads
     devices = list_devices(device_type=14)
 
-    # Get their active power on each phase
-    devices['phase_0'] = [0] * len(devices)
-    devices['phase_1'] = [0] * len(devices)
-    devices['phase_2'] = [0] * len(devices)
-    devices['activepower_0'] = [0] * len(devices)
-    devices['activepower_1'] = [0] * len(devices)
-    devices['activepower_2'] = [0] * len(devices)
-
-    for value in devices.itertuples():
+    # Get their active power on each phase (gathered in lists)
+    columns = ['phase_0', 'phase_1', 'phase_2', 'activepower_0', 'activepower_1', 'activepower_2']
+    results = {column: [] for column in columns}
+    device_types = devices['device_type_id'].astype(int).tolist()
+    for device_number, device_type in zip(devices['device_number'].tolist(), device_types):
         for index in [0, 1, 2]:
             try:
-                devices.loc[value.Index, 'activepower_' + str(index)] = cympy.study.GetValueDevice(
+                results['activepower_' + str(index)].append(cympy.study.GetValueDevice(
                     'CustomerLoads[0].CustomerLoadModels[0].CustomerLoadValues[' + str(index) + '].LoadValue.KW',
-                    value.device_number, int(value.device_type_id))
-            except:
-                devices.loc[value.Index, 'activepower_' + str(index)] = False
+                    device_number, device_type))
+            except Exception:
+                results['activepower_' + str(index)].append(False)
 
             try:
-                devices.loc[value.Index, 'phase_' + str(index)] = cympy.study.GetValueDevice(
+                results['phase_' + str(index)].append(cympy.study.GetValueDevice(
                     'CustomerLoads[0].CustomerLoadModels[0].CustomerLoadValues[' + str(index) + '].Phase',
-                    value.device_number, int(value.device_type_id))
-            except:
-                devices.loc[value.Index, 'phase_' + str(index)] = False
+                    device_number, device_type))
+            except Exception:
+                results['phase_' + str(index)].append(False)
+
+    # Create the columns
+    for column in columns:
+        devices[column] = results[column]
     return devices
 
 
@@ -48,17 +56,17 @@ def list_pvs():
     # Get a list of all the loads
     devices = list_devices(device_type=39)
 
-    # Get their generation on each phase
-    devices['generation'] = [0] * len(devices)
-
-    for value in devices.itertuples():
-        # Get the according voltage per phase in a pandas dataframe
-        devices.loc[value.Index, 'generation'] = cympy.study.QueryInfoDevice(
-            'PVActiveGeneration', value.device_number, int(value.device_type_id))
+    # Get their generation (gathered in a list)
+    generation = []
+    device_types = devices['device_type_id'].astype(int).tolist()
+    for device_number, device_type in zip(devices['device_number'].tolist(), device_types):
+        generation.append(cympy.study.QueryInfoDevice(
+            'PVActiveGeneration', device_number, device_type))
+    devices['generation'] = generation
 
     # Cast the right type
     for column in ['generation']:
-        devices[column] = devices[column].apply(lambda x: 0 if x is '' else float(x))
+        devices[column] = pandas.to_numeric(devices[column], errors='coerce').fillna(0)
     return devices
 
 
@@ -80,18 +88,15 @@ def list_devices(device_type=False, verbose=False):
         # Get all devices
         devices = cympy.study.ListDevices()
 
-    # Create a dataframe
-    devices = pandas.DataFrame(devices, columns=['device'])
-    devices['device_type_id'] = devices['device'].apply(lambda x: x.DeviceType)
-    devices['device_number'] = devices['device'].apply(lambda x: x.DeviceNumber)
-    devices['device_type'] = devices['device_type_id'].apply(lambda x: lookup.type_table[x])
+    # Create a dataframe (read the type and number of each device in one pass)
+    devices = pandas.DataFrame([(device, device.DeviceType, device.DeviceNumber) for device in devices],
+                               columns=['device', 'device_type_id', 'device_number'])
+    devices['device_type'] = devices['device_type_id'].map(lookup.type_table)
 
     # Get the break down of each type
     if verbose:
-        unique_type = devices['device_type'].unique().tolist()
-        for device_type in unique_type:
-            print('There are ' + str(devices[devices.device_type == device_type].count()[0]) +
-                  ' ' + device_type)
+        for device_type, count in devices['device_type'].value_counts(sort=False).items():
+            print('There are ' + str(count) + ' ' + device_type)
 
     return devices
 
@@ -108,30 +113,18 @@ def list_nodes():
 
     # Create a frame
     nodes = pandas.DataFrame(nodes, columns=['node_object'])
-    nodes['node_id'] = nodes['node_object'].apply(lambda x: x.ID)
-
-    nodes['section_id'] = [0] * len(nodes)
-    nodes['latitude'] = [0] * len(nodes)
-    nodes['longitude'] = [0] * len(nodes)
-    nodes['distance'] = [0] * len(nodes)
-
-    for node in nodes.itertuples():
-        nodes.loc[node.Index, 'section_id'] = cympy.study.QueryInfoNode("SectionId", node.node_id)
-        nodes.loc[node.Index, 'latitude'] = cympy.study.QueryInfoNode("CoordY", node.node_id)
-        nodes.loc[node.Index, 'longitude'] = cympy.study.QueryInfoNode("CoordX", node.node_id)
-        nodes.loc[node.Index, 'distance'] = cympy.study.QueryInfoNode("Distance", node.node_id)
-
-    # Cast the right type
-    for column in ['latitude']:
-        nodes[column] = nodes[column].apply(lambda x: None if x is '' else float(x) / (1.26 * 100000))
-
-    # Cast the right type
-    for column in ['longitude']:
-        nodes[column] = nodes[column].apply(lambda x: None if x is '' else float(x) / (100000))
-
-    # Cast the right type
-    for column in ['distance']:
-        nodes[column] = nodes[column].apply(lambda x: None if x is '' else float(x))
+    node_ids = [node.ID for node in nodes['node_object']]
+    nodes['node_id'] = node_ids
+
+    # Query each column straight into its final type (scale the coordinates)
+    query = cympy.study.QueryInfoNode
+    nodes['section_id'] = [query("SectionId", node_id) for node_id in node_ids]
+    nodes['latitude'] = pandas.to_numeric(
+        [query("CoordY", node_id) for node_id in node_ids], errors='coerce') / (1.26 * 100000)
+    nodes['longitude'] = pandas.to_numeric(
+        [query("CoordX", node_id) for node_id in node_ids], errors='coerce') / (100000)
+    nodes['distance'] = pandas.to_numeric(
+        [query("Distance", node_id) for node_id in node_ids], errors='coerce').astype(float)
 
     return nodes
 
@@ -220,28 +213,82 @@ def load_allocation(values):
     demand.DemandC.Value2 = values['Q_C']
     demand.LoadValueType = cympy.enums.LoadValueType.KW_KVAR
 
-    # Get a list of networks
-    networks = cympy.study.ListNetworks()
+    # Get the first network
+    network = cympy.study.ListNetworks()[0]
 
     # Set the first feeders demand
-    la.SetDemand(networks[0], demand)
+    la.SetDemand(network, demand)
 
     # Set up the right voltage [V to kV]
-    cympy.study.SetValueTopo(values['VMAG_A'] / 1000,
-        "Sources[0].EquivalentSourceModels[0].EquivalentSource.OperatingVoltage1", networks[0])
-    cympy.study.SetValueTopo(values['VMAG_B'] / 1000,
-        "Sources[0].EquivalentSourceModels[0].EquivalentSource.OperatingVoltage2", networks[0])
-    cympy.study.SetValueTopo(values['VMAG_C'] / 1000,
-        "Sources[0].EquivalentSourceModels[0].EquivalentSource.OperatingVoltage3", networks[0])
+    for name, path in zip(['VMAG_A', 'VMAG_B', 'VMAG_C'], _VOLT_PATHS):
+        cympy.study.SetValueTopo(values[name] / 1000, path, network)
 
     # Run the load allocation
-    la.Run([networks[0]])
+    la.Run([network])
+
+
+def _run_queries(query, arguments, workers=None):
+    """Call a cympy query once per tuple of arguments
+
+    cympy is COM-backed and can only be used from a single process (see
+    front_end/worker/README.md), calling it from several threads has not
+    been validated: workers is experimental and the default runs the
+    queries sequentially.
+
+    Args:
+        query (Function): cympy query (e.g. cympy.study.QueryInfoDevice)
+        arguments (List): tuples of arguments to pass to the query
+        workers (Int): experimental, if passed dispatch the queries on a
+            pool of threads (default None, sequential)
+
+    Return:
+        results (List): query results in the same order as the arguments
+    """
+    if not workers:
+        return [query(*argument) for argument in arguments]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda argument: query(*argument), arguments))
+
+
+def _query_columns(query, ids, keywords, workers=None):
+    """Query the same keywords for every id
+
+    Args:
+        query (Function): cympy query called as query(keyword, *ids[i])
+        ids (List): tuples identifying each object (e.g. (node_id,))
+        keywords (List): CymDIST keywords to query (e.g. ['VpuA', 'VpuB'])
+        workers (Int): number of threads to run the queries (default None)
+
+    Return:
+        results (List): one list of raw query results per keyword, in the
+            same order as ids
+    """
+    arguments = [(keyword,) + identifier for identifier in ids for keyword in keywords]
+    results = _run_queries(query, arguments, workers)
+    return [results[index::len(keywords)] for index in range(0, len(keywords))]
 
 
-def get_voltage(frame, is_node=False):
+def _query_devices(devices, keywords, workers=None):
+    """Query the same keywords for every device
+
+    Args:
+        devices (DataFrame): devices with device_number and device_type_id
+        keywords (List): CymDIST keywords to query (e.g. ['VpuA', 'VpuB'])
+        workers (Int): number of threads to run the queries (default None)
+
+    Return:
+        results (List): one list of raw query results per keyword
+    """
+    device_types = devices['device_type_id'].astype(int).tolist()
+    ids = list(zip(devices['device_number'].tolist(), device_types))
+    return _query_columns(cympy.study.QueryInfoDevice, ids, keywords, workers)
+
+
+def get_voltage(frame, is_node=False, workers=None):
     """
     Args:
         devices (DataFrame): list of all the devices or nodes to include
+        workers (Int): number of threads to run the queries (default None)
 
     Return:
         devices_voltage (DataFrame): devices and their corresponding voltage for
@@ -250,38 +297,26 @@ def get_voltage(frame, is_node=False):
     # Create a new frame to hold the results
     voltage = frame.copy()
 
-    # Reset or create new columns to hold the result
-    voltage['voltage_A'] = [0] * len(voltage)
-    voltage['voltage_B'] = [0] * len(voltage)
-    voltage['voltage_C'] = [0] * len(voltage)
-
-    for value in frame.itertuples():
-        if not is_node:
-            # Get the according voltage per phase in a pandas dataframe
-            voltage.loc[value.Index, 'voltage_A'] = cympy.study.QueryInfoDevice(
-                "VpuA", value.device_number, int(value.device_type_id))
-            voltage.loc[value.Index, 'voltage_B'] = cympy.study.QueryInfoDevice(
-                "VpuB", value.device_number, int(value.device_type_id))
-            voltage.loc[value.Index, 'voltage_C'] = cympy.study.QueryInfoDevice(
-                "VpuC", value.device_number, int(value.device_type_id))
-        else:
-            # Get the according voltage per phase in a pandas dataframe
-            voltage.loc[value.Index, 'voltage_A'] = cympy.study.QueryInfoNode("VpuA", value.node_id)
-            voltage.loc[value.Index, 'voltage_B'] = cympy.study.QueryInfoNode("VpuB", value.node_id)
-            voltage.loc[value.Index, 'voltage_C'] = cympy.study.QueryInfoNode("VpuC", value.node_id)
+    # Query the voltage per phase
+    keywords = ['VpuA', 'VpuB', 'VpuC']
+    if not is_node:
+        results = _query_devices(frame, keywords, workers)
+    else:
+        ids = [(node_id,) for node_id in frame['node_id'].tolist()]
+        results = _query_columns(cympy.study.QueryInfoNode, ids, keywords, workers)
 
-    # Cast the right type
-    for column in ['voltage_A', 'voltage_B', 'voltage_C']:
-        voltage[column] = voltage[column].apply(lambda x: None if x is '' else float(x))
+    # Create the columns and cast the right type
+    for column, values in zip(['voltage_A', 'voltage_B', 'voltage_C'], results):
+        voltage[column] = pandas.to_numeric(values, errors='coerce').astype(float)
 
     return voltage
 
 
-def get_overload(devices):
+def get_overload(devices, workers=None):
     """
     Args:
         devices (DataFrame): list of all the devices to include
-        first_n_devices (Int): number of row to return
+        workers (Int): number of threads to run the queries (default None)
 
     Return:
         overload_device (DataFrame): return the n devices with the highest load
@@ -289,31 +324,21 @@ def get_overload(devices):
     # Create a new frame to hold the results
     overload = devices.copy()
 
-    # Reset or create new columns to hold the result
-    overload['overload_A'] = [0] * len(overload)
-    overload['overload_B'] = [0] * len(overload)
-    overload['overload_C'] = [0] * len(overload)
+    # Query the overload per phase
+    results = _query_devices(devices, ['OverloadAmpsA', 'OverloadAmpsB', 'OverloadAmpsC'], workers)
 
-    for device in devices.itertuples():
-        # Get the according overload per phase in a pandas dataframe
-        overload.loc[device.Index, 'overload_A'] = cympy.study.QueryInfoDevice(
-            "OverloadAmpsA", device.device_number, int(device.device_type_id))
-        overload.loc[device.Index, 'overload_B'] = cympy.study.QueryInfoDevice(
-            "OverloadAmpsB", device.device_number, int(device.device_type_id))
-        overload.loc[device.Index, 'overload_C'] = cympy.study.QueryInfoDevice(
-            "OverloadAmpsC", device.device_number, int(device.device_type_id))
-
-    # Cast the right type
-    for column in ['overload_A', 'overload_B', 'overload_C']:
-        overload[column] = overload[column].apply(lambda x: None if x is '' else float(x))
+    # Create the columns and cast the right type
+    for column, values in zip(['overload_A', 'overload_B', 'overload_C'], results):
+        overload[column] = pandas.to_numeric(values, errors='coerce').astype(float)
 
     return overload
 
 
-def get_load(devices):
+def get_load(devices, workers=None):
     """
     Args:
         devices (DataFrame): list of all the devices to include
+        workers (Int): number of threads to run the queries (default None)
 
     Return:
         devices_voltage (DataFrame): devices and their corresponding load for
@@ -322,71 +347,40 @@ def get_load(devices):
     # Create a new frame to hold the results
     load = devices.copy()
 
-    # Reset or create new columns to hold the result
-    load['MWA'] = [0] * len(load)
-    load['MWB'] = [0] * len(load)
-    load['MWC'] = [0] * len(load)
-    load['MWTOT'] = [0] * len(load)
-    load['MVARA'] = [0] * len(load)
-    load['MVARB'] = [0] * len(load)
-    load['MVARC'] = [0] * len(load)
-    load['MVARTOT'] = [0] * len(load)
-
-    for device in devices.itertuples():
-        # Get the according load per phase in a pandas dataframe
-        load.loc[device.Index, 'MWA'] = cympy.study.QueryInfoDevice(
-            "MWA", device.device_number, int(device.device_type_id))
-        load.loc[device.Index, 'MWB'] = cympy.study.QueryInfoDevice(
-            "MWB", device.device_number, int(device.device_type_id))
-        load.loc[device.Index, 'MWC'] = cympy.study.QueryInfoDevice(
-            "MWC", device.device_number, int(device.device_type_id))
-        load.loc[device.Index, 'MWTOT'] = cympy.study.QueryInfoDevice(
-            "MWTOT", device.device_number, int(device.device_type_id))
-        load.loc[device.Index, 'MVARA'] = cympy.study.QueryInfoDevice(
-            "MVARA", device.device_number, int(device.device_type_id))
-        load.loc[device.Index, 'MVARB'] = cympy.study.QueryInfoDevice(
-            "MVARB", device.device_number, int(device.device_type_id))
-        load.loc[device.Index, 'MVARC'] = cympy.study.QueryInfoDevice(
-            "MVARC", device.device_number, int(device.device_type_id))
-        load.loc[device.Index, 'MVARTOT'] = cympy.study.QueryInfoDevice(
-            "MVARTOT", device.device_number, int(device.device_type_id))
+    # Query the load per phase
+    keywords = ['MWA', 'MWB', 'MWC', 'MWTOT', 'MVARA', 'MVARB', 'MVARC', 'MVARTOT']
+    results = _query_devices(devices, keywords, workers)
 
-    # Cast the right type
-    for column in ['MWA', 'MWB', 'MWC', 'MWTOT', 'MVARA', 'MVARB', 'MVARC', 'MVARTOT']:
-        load[column] = load[column].apply(lambda x: None if x is '' else float(x))
+    # Create the columns and cast the right type
+    for keyword, values in zip(keywords, results):
+        load[keyword] = pandas.to_numeric(values, errors='coerce').astype(float)
 
     return load
 
 
-def get_distance(devices):
+def get_distance(devices, workers=None):
     """
     Args:
         devices (DataFrame): list of all the devices to include
+        workers (Int): number of threads to run the queries (default None)
 
     Return:
         devices_distance (DataFrame): devices and their corresponding distance from the substation
     """
     distance = devices.copy()
 
-    # Reset or create new columns to hold the result
-    distance['distance'] = [0] * len(distance)
-
-    for device in devices.itertuples():
-        # Get the according distance in a pandas dataframe
-        distance.loc[device.Index, 'distance'] = cympy.study.QueryInfoDevice(
-            "Distance", device.device_number, int(device.device_type_id))
-
-    # Cast the right type
-    for column in ['distance']:
-        distance[column] = distance[column].apply(lambda x: None if x is '' else float(x))
+    # Query the distance, create the column and cast the right type
+    values, = _query_devices(devices, ['Distance'], workers)
+    distance['distance'] = pandas.to_numeric(values, errors='coerce').astype(float)
 
     return distance
 
 
-def get_coordinates(devices):
+def get_coordinates(devices, workers=None):
     """
     Args:
         devices (DataFrame): list of all the devices to include
+        workers (Int): number of threads to run the queries (default None)
 
     Return:
         devices_distance (DataFrame): devices and their corresponding latitude
@@ -394,57 +388,89 @@ def get_coordinates(devices):
     """
     coordinates = devices.copy()
 
-    # Reset or create new columns to hold the result
-    coordinates['latitude'] = [0] * len(coordinates)
-    coordinates['longitude'] = [0] * len(coordinates)
-    coordinates['section_id'] = [0] * len(coordinates)
-
-    for device in devices.itertuples():
-        # Get the according latitude in a pandas dataframe
-        coordinates.loc[device.Index, 'latitude'] = cympy.study.QueryInfoDevice(
-            "CoordY", device.device_number, int(device.device_type_id))
+    # Query the latitude, longitude and section id
+    latitude, longitude, section_id = _query_devices(devices, ['CoordY', 'CoordX', 'SectionId'], workers)
 
-        # Get the according longitude in a pandas dataframe
-        coordinates.loc[device.Index, 'longitude'] = cympy.study.QueryInfoDevice(
-            "CoordX", device.device_number, int(device.device_type_id))
+    # Cast the right type and scale the coordinates
+    coordinates['latitude'] = pandas.to_numeric(latitude, errors='coerce') / (1.26 * 100000)
+    coordinates['longitude'] = pandas.to_numeric(longitude, errors='coerce') / (100000)
+    coordinates['section_id'] = section_id
 
-        # Get the section id in a pandas dataframe
-        coordinates.loc[device.Index, 'section_id'] = cympy.study.QueryInfoDevice(
-            "SectionId", device.device_number, int(device.device_type_id))
-
-    # Cast the right type
-    for column in ['latitude']:
-        coordinates[column] = coordinates[column].apply(lambda x: None if x is '' else float(x) / (1.26 * 100000))
+    return coordinates
 
-    # Cast the right type
-    for column in ['longitude']:
-        coordinates[column] = coordinates[column].apply(lambda x: None if x is '' else float(x) / (100000))
 
-    return coordinates
+def _mean_max_diff_numpy(phases):
+    """Mean across phases and max difference with the mean [%] for each row
+    (missing phases are ignored)
 
+    Args:
+        phases (Array): N x 3 float array of voltage per phase
 
-def get_unbalanced_line(devices):
-    """This function requires the get_voltage function has been called before.
+    Return:
+        mean (Array), diff (Array)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.nansum(phases, axis=1) / np.sum(~np.isnan(phases), axis=1)
+        diff = np.fmax.reduce(np.abs(phases - mean[:, None]) * 100 / mean[:, None], axis=1)
+    return mean, diff
+
+
+if njit is not None:
+    # Same kernel in a single pass over the rows (error_model='numpy' keeps
+    # NaN/inf on a zero division as in the NumPy version)
+    @njit(cache=True, parallel=True, error_model='numpy')
+    def _mean_max_diff_numba(phases):
+        mean = np.empty(phases.shape[0])
+        diff = np.empty(phases.shape[0])
+        for row in prange(phases.shape[0]):
+            total = 0.0
+            count = 0
+            for phase in range(phases.shape[1]):
+                if not np.isnan(phases[row, phase]):
+                    total += phases[row, phase]
+                    count += 1
+            mean[row] = total / count
+
+            diff[row] = np.nan
+            for phase in range(phases.shape[1]):
+                value = abs(phases[row, phase] - mean[row]) * 100 / mean[row]
+                if not np.isnan(value) and (np.isnan(diff[row]) or value > diff[row]):
+                    diff[row] = value
+        return mean, diff
+else:
+    _mean_max_diff_numba = None
+
+
+def get_unbalanced_line(devices, voltage=None, jit=False):
+    """Compute the voltage unbalance of each device
 
     Args:
         devices (DataFrame): list of all the devices to include
-        first_n_devices (Int): number of row to return
+        voltage (DataFrame): output of get_voltage(devices), if passed the
+            voltages are not queried again (default None)
+        jit (Boolean): use the Numba kernel if numba is installed. The first
+            call of each process spends 0.15 to 0.7 s compiling or loading it,
+            so it only pays off when called many times in the same process
+            (default False)
 
     Return:
-        overload_device (DataFrame): return the n devices with the highest load
+        unbalanced_device (DataFrame): devices with their voltage per phase,
+            mean voltage and max difference with the mean [%]
     """
     # Get all the voltage
-    voltage = get_voltage(devices)
-
-    # Get the mean voltage accross phase
-    voltage['mean_voltage_ABC'] = voltage[['voltage_A', 'voltage_B', 'voltage_C']].mean(axis=1)
-
-    # Get the max difference of the three phase voltage with the mean
-    def _diff(value):
-        diff = []
-        for phase in ['voltage_A', 'voltage_B', 'voltage_C']:
-            diff.append(abs(value[phase] - value['mean_voltage_ABC']) * 100 / value['mean_voltage_ABC'])
-        return max(diff)
-    voltage['diff_with_mean'] = voltage[['mean_voltage_ABC', 'voltage_A', 'voltage_B', 'voltage_C']].apply(_diff, axis=1)
+    if voltage is None:
+        voltage = get_voltage(devices)
+    else:
+        voltage = voltage.copy()
+
+    # Get the mean voltage accross phase and the max difference of the
+    # three phase voltage with the mean (missing phases are ignored)
+    phases = np.ascontiguousarray(voltage[['voltage_A', 'voltage_B', 'voltage_C']].to_numpy(dtype=np.float64))
+    if jit and _mean_max_diff_numba is not None:
+        mean, diff = _mean_max_diff_numba(phases)
+    else:
+        mean, diff = _mean_max_diff_numpy(phases)
+    voltage['mean_voltage_ABC'] = mean
+    voltage['diff_with_mean'] = diff
 
     return voltage
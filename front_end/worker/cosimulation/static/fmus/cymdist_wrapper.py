@@ -1,10 +1,20 @@
 import json
+import os
 try:
     import cympy
-except:
+except ImportError:
     # Only installed on the Cymdist server
     pass
 
+# Path to the operating voltage of the source for the phase A, B and C
+_VOLT_PATHS = ("Sources[0].EquivalentSourceModels[0].EquivalentSource.OperatingVoltage1",
+               "Sources[0].EquivalentSourceModels[0].EquivalentSource.OperatingVoltage2",
+               "Sources[0].EquivalentSourceModels[0].EquivalentSource.OperatingVoltage3")
+
+# Study left open in CymDIST by the previous call and the devices it added
+# (key is None when the study must be opened again)
+_opened_study = {'key': None, 'devices': []}
+
 
 def cymdist(configuration_filename, time, input_voltage_names,
             input_voltage_values, output_names, input_save_to_file):
@@ -66,10 +76,7 @@ def cymdist(configuration_filename, time, input_voltage_names,
 
     def _input_voltages(input_voltage_names, input_voltage_values):
         """Create a dictionary from the input values and input names for voltages"""
-        voltages = {}
-        for name, value in zip(input_voltage_names, input_voltage_values):
-            voltages[name] = value
-        return voltages
+        return dict(zip(input_voltage_names, input_voltage_values))
 
     def _read_configuration_file(configuration_filename, current_time):
         """This function open the configuration file and pick the right model given
@@ -89,32 +96,60 @@ def cymdist(configuration_filename, time, input_voltage_names,
         model = configuration['models'][_closest_time(current_time, configuration['times'])]
         return model
 
-    def _set_voltages(voltages, networks):
+    def _open_model(model):
+        """Open the model, unless the previous call left the same study open:
+        then only remove the devices it added (set values are applied again).
+
+        New loads overwrite the existing load of their section and removing
+        them does not restore it, so the study is only reused when the same
+        sections get new loads and PVs again.
+        """
+        new_sections = [[load['section_id'] for load in model['new_loads'] or []],
+                        [pv['section_id'] for pv in model['new_pvs'] or []]]
+        key = (model['filename'], os.path.getmtime(model['filename']),
+               json.dumps([model['set_loads'], model['set_pvs'], new_sections], sort_keys=True))
+        reuse = _opened_study['key'] == key
+        devices = list(_opened_study['devices'])
+
+        # Force a new open if this call does not complete
+        _opened_study['key'] = None
+        _opened_study['devices'] = []
+
+        if reuse:
+            try:
+                for name, device_type in devices:
+                    cympy.study.RemoveDevice(name, device_type)
+            except Exception:
+                # Some devices may be left in the study: start from the file
+                reuse = False
+        if not reuse:
+            cympy.study.Open(model['filename'])
+        return key
+
+    def _set_voltages(voltages, network):
         """Set the voltage at the source node"""
         # Set up the right voltage in kV (input must be V)
-        cympy.study.SetValueTopo(voltages['VMAG_A'] / 1000,
-            "Sources[0].EquivalentSourceModels[0].EquivalentSource.OperatingVoltage1", networks[0])
-        cympy.study.SetValueTopo(voltages['VMAG_B'] / 1000,
-            "Sources[0].EquivalentSourceModels[0].EquivalentSource.OperatingVoltage2", networks[0])
-        cympy.study.SetValueTopo(voltages['VMAG_C'] / 1000,
-            "Sources[0].EquivalentSourceModels[0].EquivalentSource.OperatingVoltage3", networks[0])
+        for name, path in zip(['VMAG_A', 'VMAG_B', 'VMAG_C'], _VOLT_PATHS):
+            cympy.study.SetValueTopo(voltages[name] / 1000, path, network)
         return True
 
     def _add_loads(loads):
-        for index, load in enumerate(loads):
+        # Path to the active power of each phase (same for every load)
+        power_paths = ['CustomerLoads[0].CustomerLoadModels[0].CustomerLoadValues[' + str(phase) + '].LoadValue.KW'
+                       for phase in range(0, 3)]
+        names = ["MY_LOAD_" + str(index) for index in range(0, len(loads))]
+        _opened_study['devices'].extend((name, 14) for name in names)
+        for name, load in zip(names, loads):
             # Add load and overwrite (load demand need to be sum of previous load and new)
             temp_load_model = cympy.study.AddDevice(
-                "MY_LOAD_" + str(index), 14, load['section_id'], 'DEFAULT',
+                name, 14, load['section_id'], 'DEFAULT',
                 cympy.enums.Location.FirstAvailable , True)
 
             # Set power demand
-            phases = list(cympy.study.QueryInfoDevice("Phase", "MY_LOAD_" + str(index), 14))
+            phases = cympy.study.QueryInfoDevice("Phase", name, 14)
             power = load['active_power'] / len(phases)
             for phase in range(0, len(phases)):
-                cympy.study.SetValueDevice(
-                    power,
-                    'CustomerLoads[0].CustomerLoadModels[0].CustomerLoadValues[' + str(phase) + '].LoadValue.KW',
-                    "MY_LOAD_" + str(index), 14)
+                cympy.study.SetValueDevice(power, power_paths[phase], name, 14)
             # Note: customer is still 0 as well as energy values, does it matters?
         return True
 
@@ -128,9 +163,11 @@ def cymdist(configuration_filename, time, input_voltage_names,
 
     def _add_pvs(pvs):
         """Add new pvs on the grid"""
-        for index, pv in enumerate(pvs):
+        names = ["my_pv_" + str(index) for index in range(0, len(pvs))]
+        _opened_study['devices'].extend((name, cympy.enums.DeviceType.Photovoltaic) for name in names)
+        for name, pv in zip(names, pvs):
             # Add PVs
-            device = cympy.study.AddDevice("my_pv_" + str(index), cympy.enums.DeviceType.Photovoltaic, pv['section_id'])
+            device = cympy.study.AddDevice(name, cympy.enums.DeviceType.Photovoltaic, pv['section_id'])
 
             # Set PV size (add + 30 to make sure rated power is above generated power)
             device.SetValue(int((pv['generation'] + 30) / (23 * 0.08)), "Np")  # (ns=23 * np * 0.08 to find kW) --> kw / (23 * 0.08)
@@ -171,11 +208,8 @@ def cymdist(configuration_filename, time, input_voltage_names,
 
     def _output_values(source_node_id, output_names):
         """Query the right output name at the source node"""
-        output = []
-        for category in output_names:
-            temp = cympy.study.QueryInfoNode(category, source_node_id)
-            output.append(float(temp) * 1.0)
-        return output
+        query = cympy.study.QueryInfoNode
+        return [float(query(category, source_node_id)) for category in output_names]
 
     # Process input and check for validity
     voltages = _input_voltages(input_voltage_names, input_voltage_values)
@@ -186,12 +220,12 @@ def cymdist(configuration_filename, time, input_voltage_names,
 
     model = _read_configuration_file(configuration_filename, time)
 
-    # Open the model
-    cympy.study.Open(model['filename'])
+    # Open the model (or reuse the study left open by the previous call)
+    study_key = _open_model(model)
 
-    # Set voltages
-    networks = cympy.study.ListNetworks()
-    _set_voltages(voltages, networks)
+    # Set voltages (on the first network)
+    network = cympy.study.ListNetworks()[0]
+    _set_voltages(voltages, network)
 
     # Set loads
     if model['set_loads']:
@@ -214,10 +248,13 @@ def cymdist(configuration_filename, time, input_voltage_names,
     lf.Run()
 
     # Return the right values
-    source_node_id = cympy.study.GetValueTopo("Sources[0].SourceNodeID", networks[0])
+    source_node_id = cympy.study.GetValueTopo("Sources[0].SourceNodeID", network)
     output = _output_values(source_node_id, output_names)
 
     # Write results?
     if model['save'] not in 'False':
         _write_results(source_node_id, model['save'])
+
+    # The study can be reused by the next call
+    _opened_study['key'] = study_key
     return output
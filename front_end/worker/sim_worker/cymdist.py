@@ -73,12 +73,12 @@ def get_devices_details(devices):
             device['detail'] = {}
             for prop in ['SpotKWA', 'SpotKWB', 'SpotKWC']:
                 x = cympy.study.QueryInfoDevice(prop, device_object.DeviceNumber, device_object.DeviceType)
-                device['detail'][prop] = None if x is '' else float(x)
+                device['detail'][prop] = None if x == '' else float(x)
         elif device_object.DeviceType == 39: # PVs
             device['detail'] = {}
             for prop in ['PVActiveGeneration']:
                 x = cympy.study.QueryInfoDevice(prop, device_object.DeviceNumber, device_object.DeviceType)
-                device['detail'][prop] = None if x is '' else float(x)
+                device['detail'][prop] = None if x == '' else float(x)
     return devices
 
 def get_voltages(nodes):
@@ -87,5 +87,5 @@ def get_voltages(nodes):
         node_object = node['node_object']
         for prop in ['VA', 'VB', 'VC']:
             x = cympy.study.QueryInfoNode(prop, node_object.ID)
-            node[prop] = None if x is '' else float(x)
+            node[prop] = None if x == '' else float(x)
     return nodes